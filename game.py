@@ -12,16 +12,16 @@ import os
 import math
 import random
 import sqlite3
+import threading
 
 from loguru import logger
 logger.add("game.log")
+log_assets = os.environ.get("GAME_LOG_ASSETS") == "1"
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 import pygame
 from pygame.locals import *
 pygame.init()
-clock = pygame.time.Clock()
-clock.tick(60)
 
 def create_database():
     """Create Database
@@ -49,37 +49,85 @@ if not os.path.exists('./db/highscore.db'):
 
 db_highscore = "./db/highscore.db" 
 db_com = sqlite3.connect(db_highscore)
+db_com.execute("PRAGMA journal_mode=WAL")
+db_com.execute("PRAGMA synchronous=NORMAL")
+db_com.execute("CREATE INDEX IF NOT EXISTS idx_score ON highscore (score DESC)")
 db_cur = db_com.cursor()
 logger.info("Database loaded")
 
+def save_score(score):
+    """Save score
+        - Writes the score into the database on a separate thread, so the commit does not block the game over screen
+        - The thread uses its own connection, as sqlite connections can only be used in the thread they were created in
+        - The thread is not a daemon, so the score is still written if the game is closed right after the game over
+
+        Args:
+            - score (int): Score which should be saved
+
+        Tests:
+            - Check if the achieved score is displayed in the scoreboard if it is high enough
+            - Check if the score is saved when the game is closed directly on the game over screen
+    """
+    def write():
+        db_thread_com = sqlite3.connect(db_highscore)
+        db_thread_com.execute("PRAGMA synchronous=NORMAL")
+        db_thread_com.execute("INSERT INTO highscore (score) VALUES (?)", (score,))
+        db_thread_com.commit()
+        db_thread_com.close()
+        logger.info("Score '{}' saved", score)
+
+    threading.Thread(target=write).start()
+
 windowwidth = 1280
 windowheight = 720
 
-class Window(pygame.sprite.Sprite):
-    def __init__(self, x):
-        """Window 
-        - Creates a sprite for the window border
-        - Sprite is a rect with an offset in the respective direction of the border
-
-        Test:
-            - Check if the bullet number decreases when the bullet hits the right window border
-            - Check if the meteorite number decreases when the meteorite hits the left window border
-        """
-        pygame.sprite.Sprite.__init__(self)
-        self.rect = pygame.Rect(x, 0, 11, windowheight)
+text_cache = {}
+image_cache = {}
 
-window_left = Window(-96)
-window_right = Window(windowwidth + 96)
 
 screen = pygame.display.set_mode((windowwidth, windowheight))
 
+menu_music = pygame.mixer.Sound("./assets/music/menu.mp3")
+game_music = pygame.mixer.Sound("./assets/music/game.mp3")
+pygame.mixer.set_reserved(1)
+music_channel = pygame.mixer.Channel(0)
+logger.info("Music loaded")
+
+
+
+def load_scaled(path, size_x, size_y):
+    """Load scaled image
+        - Loads an image, resizes it and converts it to the pixel format of the screen
+        - Loaded images are kept in "image_cache", so the same image with the same size is only loaded once
+
+        Args:
+            - path (str):   Path of the image to be loaded
+            - size_x (int): Desired width of image
+            - size_y (int): Desired height of image
+
+        Return:
+            - Returns the scaled image
+
+        Tests:
+            - Check if the image has the desired size
+            - Check if the buttons of the menu share their images
+    """
+    key = (path, size_x, size_y)
+    image = image_cache.get(key)
+
+    if image is None:
+        image = pygame.transform.scale(pygame.image.load(path).convert_alpha(), (size_x, size_y)).convert_alpha()
+        image_cache[key] = image
+
+    return image
+
 
 
 class Image_List():
     def __init__(self, array, size_x, size_y, dir):
         """Image List
         - Adds images to a given array
-        - Images are converted and resized beforehand
+        - Images are converted and resized beforehand with load_scaled()
 
         Args:
             - array (array): Array in which the images are to be appended
@@ -88,14 +136,16 @@ class Image_List():
             - dir (str):     Folder in which the images to be imported are located
 
         Test:
-            - Check log if all images from the directory are loaded
+            - Check log if the directory is loaded
+            - Check log if all images from the directory are loaded, if "GAME_LOG_ASSETS=1" is set
             - Check array if all images from the directory are loaded
         """
-        for self.file in sorted(os.listdir(dir)):
-            self.image_import = pygame.image.load(dir + self.file).convert_alpha()
-            self.image = pygame.transform.scale(self.image_import, (size_x, size_y))
-            array.append(self.image)
-            logger.info('Image loaded "' + dir + self.file + '"')
+        for file in sorted(os.listdir(dir)):
+            array.append(load_scaled(dir + file, size_x, size_y))
+            if log_assets:
+                logger.info('Image loaded "{}{}"', dir, file)
+
+        logger.info('Images loaded from "{}"', dir)
 
 
 
@@ -103,6 +153,7 @@ class Text():
     def __init__(self, text, font, text_size):
         """Text
         - Renders a text with the desired font and font size
+        - Rendered surfaces are kept in "text_cache", so identical texts are only rendered once
 
         Args:
             - text (str):      Desired text which should be displayed
@@ -110,28 +161,18 @@ class Text():
             - text_size (int): Desired font size
 
         Test:
-            - Check log if all text entities are loaded
+            - Check log if all text entities are loaded, if "GAME_LOG_ASSETS=1" is set
             - Check if object is created
+            - Check if a text is only logged once when the same sub-menu is opened again
         """
-        self.font = pygame.font.Font(font, text_size)
-        self.surface = self.font.render(text, True, (255,255,255))
-        self.rect = self.surface.get_rect()
-        logger.info('Text "' + text + '" loaded')
-
-    def draw(self, x, y):
-        """Draw text
-        - Draws the pre-rendered text to a specified position
+        key = (text, font, text_size)
+        self.surface = text_cache.get(key)
 
-        Args:
-            - x (int): X-coordinate where the text should be placed
-            - y (int): Y-coordinate where the text should be placed
-
-        Test:
-            - Check if text is rendered
-            - Check if correct font and size is used
-        """
-        self.rect.topleft = (x, y)
-        screen.blit(self.surface, self.rect)
+        if self.surface is None:
+            self.surface = pygame.font.Font(font, text_size).render(text, True, (255,255,255))
+            text_cache[key] = self.surface
+            if log_assets:
+                logger.info('Text "{}" loaded', text)
 
 
 
@@ -140,6 +181,7 @@ class Button():
         """Button
         - Renders a button
         - Places a given text with Text() inside the button
+        - Calculates the offset of the text once, so it is centered inside the button
         - Also loads another image for each button to create a hover effect
 
         Args:
@@ -156,39 +198,49 @@ class Button():
         self.width = width
         self.height = height
         self.text = text
-        self.image_import = pygame.image.load(image).convert_alpha()
-        self.image_hover_import = pygame.image.load(image_hover).convert_alpha()
-        self.image = pygame.transform.scale(self.image_import, (width, height))
-        self.image_hover = pygame.transform.scale(self.image_hover_import, (width, height))
+        self.image = load_scaled(image, width, height)
+        self.image_hover = load_scaled(image_hover, width, height)
         self.hover = False
+        self.hover_drawn = False
         self.rect = self.image.get_rect()
                
         self.button_text = Text(self.text, "./assets/fonts/silkscreen-regular.ttf", 20)
+        self.text_dx = (self.width - self.button_text.surface.get_width() + 1) // 2
+        self.text_dy = (self.height - self.button_text.surface.get_height() + 1) // 2
+        self.text_pos = (self.text_dx, self.text_dy)
 
-        logger.info('Button "' + self.text + '" with images "' + image + " and " + image_hover + " loaded")
+        logger.info('Button "{}" with images "{} and {} loaded', self.text, image, image_hover)
     
-    def draw(self, x, y):
-        """Draw button
-        - Draws the pre-defined button to a specified position
-        - If the button has the value "hover == True", it should render another button
+    def place(self, x, y):
+        """Place button
+        - Moves the button and its text to a specified position
+        - Is called once when a menu is opened, as the buttons do not move while the menu is shown
 
         Args:
-            - x (int): X-coordinate where the text should be placed
-            - y (int): Y-coordinate where the text should be placed
+            - x (int): X-coordinate where the button should be placed
+            - y (int): Y-coordinate where the button should be placed
+
+        Test:
+            - Check if button is placed at the specified position
+            - Check if the text is centered inside the button
+        """
+        self.rect.topleft = (x, y)
+        self.text_pos = (x + self.text_dx, y + self.text_dy)
+
+    def draw(self):
+        """Draw button
+        - Draws the pre-defined button at the position set with place()
+        - If the button has the value "hover == True", it should render another button
 
         Test:
             - Check if button is rendered
             - Check if correct font and button image is used
             - Check if the hover effect is working
         """
-        self.rect.topleft = (x, y)
-
         if self.hover:
-            screen.blit(self.image_hover, (self.rect.x , self.rect.y))
+            screen.blits(((self.image_hover, self.rect), (self.button_text.surface, self.text_pos)), doreturn=0)
         else: 
-            screen.blit(self.image, (self.rect.x , self.rect.y))
-
-        self.button_text.draw(x + (self.width - self.button_text.surface.get_width())/2, y + (self.height - self.button_text.surface.get_height())/2)
+            screen.blits(((self.image, self.rect), (self.button_text.surface, self.text_pos)), doreturn=0)
 
 
 
@@ -198,6 +250,7 @@ class Menu():
         - Loads the menu music
         - Creates the buttons for the menu and adds them to the desired button lists
         - Creates a timed event to animate the background in the menu
+        - Creates a clock to limit the menus to 60 frames per second
 
         Test:
             - Check if music is playing in the menu
@@ -208,9 +261,7 @@ class Menu():
         """
         self.volume = 1
         pygame.display.set_caption("Menu")
-        pygame.mixer.music.load("./assets/music/menu.mp3")
-        pygame.mixer.music.play(loops = -1, fade_ms = 1000)
-        pygame.mixer.music.set_volume(self.volume)
+        self.playMusic(menu_music)
 
         self.menu_button_image       = "./assets/menu/buttons/button.png"
         self.menu_button_image_hover = "./assets/menu/buttons/button_hover.png"
@@ -240,30 +291,173 @@ class Menu():
         self.buttons.append(self.options_button)
         self.buttons.append(self.quit_button)
 
+        self.clock = pygame.time.Clock()
+
         self.bg_state = 0
+        self.bg_drawn = None
+        self.last_mouse_pos = None
         self.UPDATEBACKGROUND = pygame.USEREVENT
         pygame.time.set_timer(self.UPDATEBACKGROUND, 100)
         logger.info("Menu initialized")
 
-    def animateBackground(self, bool):
-        """Animate menu background
-        - If the event sets the bool to true the next background image is set
-        - If the bool is still false, therefore the event has not yet passed, the background will be rendered with the certain condition
+    def playMusic(self, music):
+        """Play music
+        - Plays the pre-loaded music in a loop on the reserved music channel
+        - Muting is done on the volume of the sounds, so the fade in of the channel does not turn muted music on again
 
         Args:
-            - bool (bool): Indicates whether to switch to the next image
+            - music (Sound): Music which should be played, e.g. "menu_music" or "game_music"
 
         Test:
-            - Check if the background cycles through different images
+            - Check if the music changes between the menu and the game
+            - Check if the music stays muted when it was turned off in the options
+        """
+        music_channel.play(music, loops = -1, fade_ms = 1000)
+
+    def drawBackground(self):
+        """Draw menu background
+        - Draws the current image of the animated background
+
+        Test:
+            - Check if the background is displayed in the menu
             - Check if the background is animated smoothly
         """
-        if bool:
-            if self.bg_state >= len(self.bg_menu)-1:
-                self.bg_state = 0
-            else:
-                self.bg_state += 1
-        else:        
-            screen.blit(self.bg_menu[self.bg_state], (0,0))
+        screen.blit(self.bg_menu[self.bg_state], (0,0))
+
+    def render(self, texts, buttons):
+        """Render menu
+        - Draws the background, the texts and the buttons of a menu, but only the parts which changed since the last frame
+        - If the background image changed or "bg_drawn" was reset, the whole window is drawn again
+        - Otherwise only the buttons whose hover state changed are drawn again on top of their part of the background
+
+        Args:
+            - texts (list):   List of (surface, position) tuples of the texts in the menu
+            - buttons (list): List of the buttons in the menu
+
+        Return:
+            - Returns the list of rects which have to be updated on the display
+
+        Test:
+            - Check if the background is animated
+            - Check if the texts and buttons are displayed in the menu
+            - Check if the hover effect is working
+        """
+        if self.bg_drawn != self.bg_state:
+            self.bg_drawn = self.bg_state
+            self.drawBackground()
+            screen.blits(texts, doreturn=0)
+
+            for button in buttons:
+                button.draw()
+                button.hover_drawn = button.hover
+
+            return [screen.get_rect()]
+
+        dirty = []
+
+        for button in buttons:
+            if button.hover != button.hover_drawn:
+                screen.blit(self.bg_menu[self.bg_state], button.rect, button.rect)
+                button.draw()
+                button.hover_drawn = button.hover
+                dirty.append(button.rect)
+
+        return dirty
+
+    def run(self, texts, buttons, handlers):
+        """Run menu
+        - Main loop which is shared by all menus
+        - Renders the menu and updates the hover state of the buttons, but only when the mouse has moved
+        - Passes the events to the handlers of the menu and limits the menu to 60 frames per second
+        - A handler which returns a screen ends the loop, so switching screens does not nest the menus in each other
+
+        Args:
+            - texts (list):    List of (surface, position) tuples of the texts in the menu
+            - buttons (list):  List of the buttons in the menu, handlers may replace buttons in it
+            - handlers (dict): Event handlers of the menu with the event type as key
+
+        Return:
+            - Returns the next screen which was returned by a handler, e.g. "menu.start" or "game.play"
+
+        Test:
+            - Check if every menu is displayed and animated
+            - Check if the hover effect is working in every menu
+            - Check if the buttons of every menu react to clicks
+        """
+        events = list(handlers)
+
+        render = self.render
+        get_pos = pygame.mouse.get_pos
+        get_events = pygame.event.get
+        clear_events = pygame.event.clear
+        update = pygame.display.update
+        tick = self.clock.tick
+
+        self.bg_drawn = None
+        self.last_mouse_pos = None
+
+        while True:
+            dirty = render(texts, buttons)
+
+            mouse_pos = get_pos()
+
+            if mouse_pos != self.last_mouse_pos:
+                self.last_mouse_pos = mouse_pos
+
+                for button in buttons:
+                    button.hover = button.rect.collidepoint(mouse_pos)
+
+            for event in get_events(events):
+                next_screen = handlers[event.type](event)
+                if next_screen is not None:
+                    return next_screen
+            clear_events(pump=False)
+
+            tick(60)
+            update(dirty)
+
+    def nextBackground(self, event):
+        """Next menu background
+        - Event handler for the timed background event, switches to the next background image
+        - After the last image it starts again with the first one
+
+        Args:
+            - event (Event): Timed event which triggered the handler
+
+        Test:
+            - Check if the background cycles through different images
+        """
+        self.bg_state = (self.bg_state + 1) % len(self.bg_menu)
+
+    def back(self, event):
+        """Back to menu
+        - Event handler for clicks in the sub-menus, goes back to the main menu if the "back" button was clicked
+
+        Args:
+            - event (Event): Mouse event which triggered the handler
+
+        Return:
+            - Returns the main menu as next screen if the "back" button was clicked
+
+        Test:
+            - Check if "back" button is working
+        """
+        if self.back_button.rect.collidepoint(event.pos):
+            return self.start
+
+    def quit(self, event):
+        """Quit game
+        - Event handler for the close button on the window, ends the program
+
+        Args:
+            - event (Event): Quit event which triggered the handler
+
+        Test:
+            - Check if the close button on the window ends the program
+        """
+        logger.info("Game endet via close button on window")
+        pygame.quit()
+        sys.exit()
 
     def start(self):
         """Main menu
@@ -272,6 +466,9 @@ class Menu():
         - You can start the game
         - You can exit the program
 
+        Return:
+            - Returns the next screen which was chosen in the menu
+
         Test:
             - Check if title is "Menu" and heading is "Space Defenders"
             - Check if each menu button is present
@@ -281,49 +478,40 @@ class Menu():
         """
         pygame.display.set_caption("Menu")
         text_name = Text("Space Defenders", "./assets/fonts/silkscreen-bold.ttf", 90)
-                
-        while True:
-            menu.animateBackground(False)
-            text_name.draw(100, 60)
-
-            offset = 0
-            mouse_pos = pygame.mouse.get_pos()
-            
-            for button in self.buttons:
-                button.draw(100, 250 + offset)
-                
-                button.hover = button.rect.collidepoint(mouse_pos)
-                offset += 75
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
-
-                if event.type == self.UPDATEBACKGROUND:
-                    menu.animateBackground(True)
-
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.play_button.rect.collidepoint(mouse_pos):
-                        game.play()
-                    if self.scoreboard_button.rect.collidepoint(mouse_pos):
-                        self.scoreboard()
-                    if self.tutorial_button.rect.collidepoint(mouse_pos):
-                        self.tutorial()
-                    if self.options_button.rect.collidepoint(mouse_pos):
-                        self.options()
-                    if self.quit_button.rect.collidepoint(mouse_pos):
-                        logger.info("Game endet via quit button on menu")
-                        pygame.quit()
-                        sys.exit()
-
-            pygame.display.update()
-            
+        texts = [(text_name.surface, (100, 60))]
+
+        def click(event):
+            if self.play_button.rect.collidepoint(event.pos):
+                return game.play
+            if self.scoreboard_button.rect.collidepoint(event.pos):
+                return self.scoreboard
+            if self.tutorial_button.rect.collidepoint(event.pos):
+                return self.tutorial
+            if self.options_button.rect.collidepoint(event.pos):
+                return self.options
+            if self.quit_button.rect.collidepoint(event.pos):
+                logger.info("Game endet via quit button on menu")
+                pygame.quit()
+                sys.exit()
+
+        handlers = {
+            pygame.QUIT:           self.quit,
+            self.UPDATEBACKGROUND: self.nextBackground,
+            MOUSEBUTTONDOWN:       click
+        }
+
+        for i, button in enumerate(self.buttons):
+            button.place(100, 250 + i * 75)
+
+        return self.run(texts, self.buttons, handlers)
+
     def scoreboard(self):
         """Scoreboard
         - Shows the first three best scores
 
+        Return:
+            - Returns the next screen which was chosen in the menu
+
         Test:
             - Check if title is "Scoreboard" and heading is "Scoreboard"
             - Check if "back" button is working
@@ -333,46 +521,37 @@ class Menu():
         pygame.display.set_caption("Scoreboard")
         text_scoreboard = Text("Scoreboard", "./assets/fonts/silkscreen-bold.ttf", 60)
 
-        highscores = db_cur.execute("SELECT score FROM highscore ORDER BY score DESC")
+        highscores = db_cur.execute("SELECT score FROM highscore ORDER BY score DESC LIMIT 3")
         highscores = highscores.fetchall()
 
         text_place_1 = Text("1st Place: " + str(highscores[0][0]), "./assets/fonts/silkscreen-bold.ttf", 20)
         text_place_2 = Text("2nd Place: " + str(highscores[1][0]), "./assets/fonts/silkscreen-bold.ttf", 20)
         text_place_3 = Text("3rd Place: " + str(highscores[2][0]), "./assets/fonts/silkscreen-bold.ttf", 20)
 
-        while True:
-            menu.animateBackground(False)
-            text_scoreboard.draw(100, 60)
-
-            text_place_1.draw(100, 200)
-            text_place_2.draw(100, 300)
-            text_place_3.draw(100, 400)
-
-            self.back_button.draw(100, 550)
-
-            mouse_pos = pygame.mouse.get_pos()
-            self.back_button.hover = self.back_button.rect.collidepoint(mouse_pos)
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
-
-                if event.type == self.UPDATEBACKGROUND:
-                    menu.animateBackground(True)
-
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.back_button.rect.collidepoint(mouse_pos):
-                        menu.start()
-
-            pygame.display.update()
+        texts = [
+            (text_scoreboard.surface, (100, 60)),
+            (text_place_1.surface,    (100, 200)),
+            (text_place_2.surface,    (100, 300)),
+            (text_place_3.surface,    (100, 400))
+        ]
+
+        handlers = {
+            pygame.QUIT:           self.quit,
+            self.UPDATEBACKGROUND: self.nextBackground,
+            MOUSEBUTTONDOWN:       self.back
+        }
+
+        self.back_button.place(100, 550)
+        return self.run(texts, [self.back_button], handlers)
     
     def tutorial(self):
         """Tutorial
         - Shows a short description of what to do in the game
         - Shows the controls for the game
 
+        Return:
+            - Returns the next screen which was chosen in the menu
+
         Test:
             - Check if title is "Tutorial" and heading is "Tutorial"
             - Check if "back" button is working
@@ -391,43 +570,35 @@ class Menu():
         text_controls_3 = Text("A - Left                                ESC - Exit to menu"           , "./assets/fonts/silkscreen-bold.ttf", 20)
         text_controls_4 = Text("D - Right"                                                            , "./assets/fonts/silkscreen-bold.ttf", 20)
 
-        while True:
-            menu.animateBackground(False)
-            text_scoreboard.draw(100, 60)
-
-            text_tutorial_1.draw(100, 250)
-            text_tutorial_2.draw(100, 270)
-            text_tutorial_3.draw(100, 290)
-
-            text_controls_1.draw(100, 400)
-            text_controls_2.draw(100, 420)
-            text_controls_3.draw(100, 440)
-            text_controls_4.draw(100, 460)
+        texts = [
+            (text_scoreboard.surface, (100, 60)),
 
-            self.back_button.draw(100, 550)
+            (text_tutorial_1.surface, (100, 250)),
+            (text_tutorial_2.surface, (100, 270)),
+            (text_tutorial_3.surface, (100, 290)),
 
-            mouse_pos = pygame.mouse.get_pos()
-            self.back_button.hover = self.back_button.rect.collidepoint(mouse_pos)
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
+            (text_controls_1.surface, (100, 400)),
+            (text_controls_2.surface, (100, 420)),
+            (text_controls_3.surface, (100, 440)),
+            (text_controls_4.surface, (100, 460))
+        ]
 
-                if event.type == self.UPDATEBACKGROUND:
-                    menu.animateBackground(True)
+        handlers = {
+            pygame.QUIT:           self.quit,
+            self.UPDATEBACKGROUND: self.nextBackground,
+            MOUSEBUTTONDOWN:       self.back
+        }
 
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.back_button.rect.collidepoint(mouse_pos):
-                        menu.start()
-
-            pygame.display.update()
+        self.back_button.place(100, 550)
+        return self.run(texts, [self.back_button], handlers)
 
     def options(self):
         """Options menu
         - Lets you mute the music in the game and in the menu
 
+        Return:
+            - Returns the next screen which was chosen in the menu
+
         Test:
             - Check if title is "Options" and heading is "Options"
             - Check if "back" button is working
@@ -438,46 +609,46 @@ class Menu():
         text_scoreboard = Text("Options", "./assets/fonts/silkscreen-bold.ttf", 60)
 
         text_music      = Text("Music:" , "./assets/fonts/silkscreen-bold.ttf", 20)
-        
-        while True:
-            menu.animateBackground(False)
-            text_scoreboard.draw(100, 60)
-           
-            text_music.draw(100, 200)
 
-            if menu.volume == 0:
-                self.mute_button.draw(230, 190)
-            else:
-                self.unmute_button.draw(230, 190)
-
-            self.back_button.draw(100, 550)
-
-            mouse_pos = pygame.mouse.get_pos()
-            self.back_button.hover = self.back_button.rect.collidepoint(mouse_pos)
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
-
-                if event.type == self.UPDATEBACKGROUND:
-                    menu.animateBackground(True)
-
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.back_button.rect.collidepoint(mouse_pos):
-                        menu.start()
-                    if self.mute_button.rect.collidepoint(mouse_pos) or self.unmute_button.rect.collidepoint(mouse_pos):
-                        if menu.volume == 0:
-                            menu.volume = 1
-                            pygame.mixer.music.set_volume(menu.volume)
-                            logger.info("Music turned on")
-                        else:
-                            menu.volume = 0
-                            pygame.mixer.music.set_volume(menu.volume)
-                            logger.info("Music turned off")
-
-            pygame.display.update()
+        texts = [
+            (text_scoreboard.surface, (100, 60)),
+            (text_music.surface,      (100, 200))
+        ]
+
+        def click(event):
+            if self.back_button.rect.collidepoint(event.pos):
+                return self.start
+            if self.mute_button.rect.collidepoint(event.pos) or self.unmute_button.rect.collidepoint(event.pos):
+                if menu.volume == 0:
+                    menu.volume = 1
+                    menu_music.set_volume(menu.volume)
+                    game_music.set_volume(menu.volume)
+                    buttons[0] = self.unmute_button
+                    logger.info("Music turned on")
+                else:
+                    menu.volume = 0
+                    menu_music.set_volume(menu.volume)
+                    game_music.set_volume(menu.volume)
+                    buttons[0] = self.mute_button
+                    logger.info("Music turned off")
+                self.bg_drawn = None
+
+        handlers = {
+            pygame.QUIT:           self.quit,
+            self.UPDATEBACKGROUND: self.nextBackground,
+            MOUSEBUTTONDOWN:       click
+        }
+
+        self.back_button.place(100, 550)
+        self.mute_button.place(230, 190)
+        self.unmute_button.place(230, 190)
+
+        if menu.volume == 0:
+            buttons = [self.mute_button, self.back_button]
+        else:
+            buttons = [self.unmute_button, self.back_button]
+
+        return self.run(texts, buttons, handlers)
 
     def gameover(self, score):
         """Game Over Screen
@@ -489,6 +660,9 @@ class Menu():
         Args:
             - score (int): Score achieved in the game run
 
+        Return:
+            - Returns the next screen which was chosen in the menu
+
         Test:
             - Check if title is "Game Over" and heading is "Game Over"
             - Check if "back" button is working
@@ -496,39 +670,310 @@ class Menu():
             - Check if the music changes from the game music to the menu music
         """
         pygame.display.set_caption("Game Over")
-        pygame.mixer.music.load("./assets/music/menu.mp3")
-        pygame.mixer.music.play(loops = -1, fade_ms = 1000)
+        self.playMusic(menu_music)
 
         text_gameover = Text("Game Over", "./assets/fonts/silkscreen-bold.ttf", 60)
         text_score = Text("Score: " + str(score), "./assets/fonts/silkscreen-regular.ttf", 40)
 
-        db_cur.execute("INSERT INTO highscore (score) VALUES ('" + str(score) + "')")
-        db_com.commit()
+        save_score(score)
 
-        while True:
-            menu.animateBackground(False)
-            text_gameover.draw(100, 60)
+        texts = [
+            (text_gameover.surface, (100, 60)),
+            (text_score.surface,    (100, 200))
+        ]
+
+        handlers = {
+            pygame.QUIT:           self.quit,
+            self.UPDATEBACKGROUND: self.nextBackground,
+            MOUSEBUTTONDOWN:       self.back
+        }
+
+        self.back_button.place(100, 550)
+        return self.run(texts, [self.back_button], handlers)
+
+
+
+class Sprite_Group(pygame.sprite.AbstractGroup):
+    def __init__(self, *sprites):
+        """Sprite group
+        - Group for bullets and meteoroids which keeps its sprites in a list instead of a dict
+        - Iterating over the group is what happens most of the time, so a list is faster than the dict of pygame.sprite.Group
+        - add_internal(), remove_internal() and has_internal() are the hooks pygame uses to add, kill and find sprites
+
+        Args:
+            - *sprites (Sprite): Sprites which should be added to the group
+
+        Test:
+            - Check if sprites are added to and removed from the group
+            - Check if object is created
+        """
+        self.sprite_list = []
+        pygame.sprite.AbstractGroup.__init__(self)
+        self.add(*sprites)
+
+    def sprites(self):
+        """Sprites of the group
+        - Returns a copy of the sprite list, so sprites can be killed while iterating over it
+
+        Return:
+            - Returns the list of sprites in the group
+
+        Test:
+            - Check if killed sprites are not in the list anymore
+        """
+        return self.sprite_list[:]
+
+    def add_internal(self, sprite, layer=None):
+        """Add sprite
+        - Hook which is called by pygame when a sprite is added to the group
+        - Appends the sprite to the end of the sprite list
+
+        Args:
+            - sprite (Sprite): Sprite which should be added to the group
+            - layer (int):     Only needed for the interface of pygame, is not used
+
+        Test:
+            - Check if the sprite is in the group after it was added
+        """
+        self.sprite_list.append(sprite)
+
+    def remove_internal(self, sprite):
+        """Remove sprite
+        - Hook which is called by pygame when a sprite is removed from the group or killed
+        - Has to search the sprite in the list, so it takes longer the more sprites are in the group
+
+        Args:
+            - sprite (Sprite): Sprite which should be removed from the group
+
+        Test:
+            - Check if the sprite is not in the group anymore after it was removed or killed
+        """
+        self.sprite_list.remove(sprite)
+
+    def has_internal(self, sprite):
+        """Has sprite
+        - Hook which is called by pygame to check if a sprite is in the group, e.g. before it is added
+        - Has to search the sprite in the list, so it takes longer the more sprites are in the group
+        - The groups only hold a few dozen sprites at most, so this is still cheaper than keeping a dict
+
+        Args:
+            - sprite (Sprite): Sprite which should be searched in the group
+
+        Return:
+            - Returns True if the sprite is in the group
+
+        Test:
+            - Check if a sprite is not added twice to the same group
+        """
+        return sprite in self.sprite_list
+
+    def __len__(self):
+        """Number of sprites
+        - Returns the length of the sprite list
+
+        Return:
+            - Returns the number of sprites in the group
+
+        Test:
+            - Check if the number changes when sprites are added or removed
+        """
+        return len(self.sprite_list)
+
+    def __bool__(self):
+        """Group is not empty
+        - Returns if the sprite list contains any sprites
+
+        Return:
+            - Returns True if there is at least one sprite in the group
+
+        Test:
+            - Check if an empty group is False
+        """
+        return len(self.sprite_list) > 0
+
+    def draw(self, surface):
+        """Draw sprite group
+        - Draws the images of all sprites in the group with one call
+        - Each image is placed at the rect of the sprite, moved by the offset of the sprite, as the images are bigger than the hitboxes
+
+        Args:
+            - surface (Surface): Surface on which the sprites should be drawn
+
+        Test:
+            - Check if bullets and meteoroids are displayed in the game
+            - Check if the images are placed on top of the hitboxes
+        """
+        surface.blits([(sprite.image, sprite.rect.move(sprite.offset)) for sprite in self.sprite_list], doreturn=0)
+
+    def collide(self, group):
+        """Collide sprite groups
+        - Checks which sprites of the group collide with the sprites of another group
+        - The rects of the other group are collected once, the rect tests itself are done by pygame with "collidelistall"
+        - Sprites outside of the bounding box of the other group are skipped without testing every rect
+        - Sprites of the other group which were hit are removed, so every one of them can only hit one sprite
+
+        Args:
+            - group (Group): Group whose sprites should be checked against the sprites of the group
+
+        Return:
+            - Returns the list of sprites of the group which were hit
+
+        Test:
+            - Check if a meteoroid explodes when a bullet hits it
+            - Check if the bullet is removed when it hits a meteoroid
+            - Check if one bullet only destroys one meteoroid
+        """
+        others = group.sprites()
+        if not others:
+            return []
+
+        rects = [other.rect for other in others]
+        bounds = rects[0].unionall(rects)
+        hit = []
 
-            text_score.draw(100, 200)
-            self.back_button.draw(100, 550)
+        for sprite in self.sprite_list:
+            if not sprite.rect.colliderect(bounds):
+                continue
 
-            mouse_pos = pygame.mouse.get_pos()
-            self.back_button.hover = self.back_button.rect.collidepoint(mouse_pos)
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
+            collided = [others[i] for i in sprite.rect.collidelistall(rects) if others[i].alive()]
+            if collided:
+                hit.append(sprite)
+                for other in collided:
+                    other.kill()
 
-                if event.type == self.UPDATEBACKGROUND:
-                    menu.animateBackground(True)
+        return hit
 
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.back_button.rect.collidepoint(mouse_pos):
-                        menu.start()
+    def collideSprite(self, sprite):
+        """Collide sprite
+        - Checks which sprites of the group collide with a single sprite, e.g. the player
+        - The rect tests are done by pygame with "collidelistall" and the sprites which were hit are removed from the group
 
-            pygame.display.update()
+        Args:
+            - sprite (Sprite): Sprite which should be checked against the sprites of the group
+
+        Return:
+            - Returns the list of sprites of the group which were hit
+
+        Test:
+            - Check if the player dies when he hits a meteoroid
+            - Check if the meteoroid is removed when the player hits it
+        """
+        sprites = self.sprite_list
+        collided = [sprites[i] for i in sprite.rect.collidelistall([other.rect for other in sprites])]
+
+        for other in collided:
+            other.kill()
+
+        return collided
+
+
+
+class Sprite_Pool():
+    def __init__(self, sprite):
+        """Sprite pool
+        - Keeps killed sprites of a class, so they can be reused instead of creating a new sprite each time
+        - The sprite class needs a reset() method, which takes the same arguments as its constructor
+
+        Args:
+            - sprite (class): Class of the sprites in the pool, e.g. Bullet or Meteoroid
+
+        Test:
+            - Check if killed sprites are added to the pool
+            - Check if no new sprites are created while there are sprites in the pool
+        """
+        self.sprite = sprite
+        self.free = []
+
+    def get(self, *args):
+        """Get sprite
+        - Takes a sprite from the pool and resets it with the given arguments
+        - Creates a new sprite if the pool is empty
+
+        Args:
+            - *args: Arguments for reset() or the constructor of the sprite class
+
+        Return:
+            - Returns the sprite object
+
+        Test:
+            - Check if the sprite is reset to the given arguments
+            - Check if a new sprite is created when the pool is empty
+        """
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            return sprite
+        return self.sprite(*args)
+
+    def fill(self, size, *args):
+        """Fill pool
+        - Creates new sprites until the pool contains the desired number of sprites
+        - Is called before the game starts, so no sprites have to be created while playing
+
+        Args:
+            - size (int): Desired number of sprites in the pool
+            - *args:      Arguments for the constructor of the sprite class
+
+        Test:
+            - Check if the pool contains the desired number of sprites
+            - Check if an already filled pool does not grow
+        """
+        while len(self.free) < size:
+            self.free.append(self.sprite(*args))
+
+    def release(self, sprite):
+        """Release sprite
+        - Puts a killed sprite back into the pool
+
+        Args:
+            - sprite (Sprite): Sprite which should be reused
+
+        Test:
+            - Check if the sprite is in the pool afterwards
+        """
+        self.free.append(sprite)
+
+
+
+class Input_State():
+    __slots__ = ("left", "right", "up", "down", "shoot")
+
+    def __init__(self):
+        """Input state
+        - Holds the directions in which the player is currently steering the ship and if the player is shooting
+        - Is created once per game and passed to the functions which need the input, instead of using global variables
+
+        Test:
+            - Check if the directions change when the movement keys are pressed
+            - Check if shoot changes when space is pressed
+            - Check if object is created
+        """
+        self.left = False
+        self.right = False
+        self.up = False
+        self.down = False
+        self.shoot = False
+
+
+
+class Game_State():
+    __slots__ = ("score", "player_speed", "meteoroid_speed", "meteoroid_timer", "next_fire_tick")
+
+    def __init__(self):
+        """Game state
+        - Holds the score, speeds and timers of the current game which change while playing
+        - Is created once per game and shared by the game loop and the event handlers, instead of loose local variables
+
+        Test:
+            - Check if the score starts at 0
+            - Check if the meteoroid speed and spawn timer change when the difficulty increases
+            - Check if object is created
+        """
+        self.score = 0
+        self.player_speed = 3
+        self.meteoroid_speed = 4
+        self.meteoroid_timer = 1500
+        self.next_fire_tick = pygame.time.get_ticks() + 500
 
 
 
@@ -543,48 +988,52 @@ class Player(pygame.sprite.Sprite):
         """
         pygame.sprite.Sprite.__init__(self)
         self.rect = pygame.Rect(100, windowheight/2 , game.image_ship[0].get_width(), game.image_ship[0].get_height())
+        self.move = 0
+        self.stand = 0
         logger.info("Player initialized")
 
-    def update(self):
+    def update(self, controls):
         """Update player animation
         - Animates the exhaust of the space ship
         - If you fly forward or backward the exhaust becomes bigger
+        - The exhaust and the ship are drawn with one call
+        - Both exhaust animations have four images, so the counters wrap around with "& 3"
+
+        Args:
+            - controls (Input_State): Directions in which the player is steering the ship
 
         Test:
             - Check if the exhaust cycles through different images
             - Check if the exhaust gets bigger if you move forward or backward
         """
-        global move
-        global stand
-
-        if move + 1 >= 4:
-            move = 0
-        if stand + 1 >= 4:
-            stand = 0
-
-        if left or right:
-            screen.blit(game.images_move[move], (self.rect.x, self.rect.y+26-4))
-            screen.blit(game.images_move[move], (self.rect.x, self.rect.y+48-4))
-            move += 1
+        if controls.left or controls.right:
+            blits = [
+                (game.images_move[self.move], (self.rect.x, self.rect.y+26-4)),
+                (game.images_move[self.move], (self.rect.x, self.rect.y+48-4))
+            ]
+            self.move = (self.move + 1) & 3
         else:
-            screen.blit(game.images_stand[stand], (self.rect.x+18, self.rect.y+26-3))
-            screen.blit(game.images_stand[stand], (self.rect.x+18, self.rect.y+48-3))
-            stand += 1
-
-        screen.blit(game.image_ship[0], (self.rect.x+35, self.rect.y))
+            blits = [
+                (game.images_stand[self.stand], (self.rect.x+18, self.rect.y+26-3)),
+                (game.images_stand[self.stand], (self.rect.x+18, self.rect.y+48-3))
+            ]
+            self.stand = (self.stand + 1) & 3
+
+        blits.append((game.image_ship[0], (self.rect.x+35, self.rect.y)))
+        screen.blits(blits, doreturn=0)
     
     def shoot(self):
         """Player shoot
         - Creates a bullet at the front of the space ship
 
         Return:
-            - Returns the bullet object
+            - Returns the bullet object from the bullet pool
 
         Test:
             - Check if bullet is created at front of the space ship
             - Check if object is created
         """
-        return Bullet(self.rect.x, self.rect.y)
+        return game.bullet_pool.get(self.rect.x, self.rect.y)
 
 
     
@@ -603,10 +1052,40 @@ class Bullet(pygame.sprite.Sprite):
         """
         pygame.sprite.Sprite.__init__(self)
         self.rect = pygame.Rect(x + 140, y + 30, 15, 12)
+        self.image = game.image_bullet[0]
+        self.offset = (-56, -56)
+        self.speed = 5
+
+    def reset(self, x, y):
+        """Reset bullet
+        - Moves a bullet from the bullet pool to the front of the space ship
+
+        Args:
+            - x (int): X-coordinate where the bullet should be placed
+            - y (int): Y-coordinate where the bullet should be placed
+
+        Test:
+            - Check if a reused bullet is created at front of the space ship
+        """
+        self.rect.topleft = (x + 140, y + 30)
+
+    def kill(self):
+        """Kill bullet
+        - Removes the bullet from all groups and puts it back into the bullet pool
+        - A bullet which is in no group anymore is not put into the pool again
+
+        Test:
+            - Check if the bullet is removed when it hits a meteoroid or leaves the window
+            - Check if the bullet is reused for the next shot
+        """
+        if self.alive():
+            pygame.sprite.Sprite.kill(self)
+            game.bullet_pool.release(self)
     
     def update(self, speed):
         """Update bullet
         - Moves the bullet to the right
+        - Kills the bullet when it has left the window on the right side
 
         Args:
             - speed (int): Speed with which the bullet flies to the right
@@ -614,20 +1093,24 @@ class Bullet(pygame.sprite.Sprite):
         Test:
             - Check if the bullet flies to the right
             - Check if the projectile speeds up or slows down when you change the speed
+            - Check if the bullet number decreases when the bullet leaves the window on the right side
         """
         self.rect.x += speed
-        screen.blit(game.image_bullet[0], (self.rect.x-56, self.rect.y-56))
+
+        if self.rect.x > windowwidth + 96:
+            self.kill()
 
 
 
 class Meteoroid(pygame.sprite.Sprite):
-    def __init__(self, y):
+    def __init__(self, y, speed):
         """Initialize meteoroid
         - Initialize meteoroid in the invisible area next to the right window border
         - This is done so that it looks like the meteoroid is flying in and not just spawning
 
         Args:
-            - y (int): Y-coordinate where the met should be placed
+            - y (int):       Y-coordinate where the met should be placed
+            - speed (float): Speed with which the meteoroid flies to the left
 
         Test:
             - Check if meteoroid is created next to the right window border
@@ -635,42 +1118,70 @@ class Meteoroid(pygame.sprite.Sprite):
         """
         pygame.sprite.Sprite.__init__(self)
         self.rect = pygame.Rect(windowwidth, y, 38 , 33)
-        self.state = 0
+        self.image = game.image_meteoroid[0]
+        self.offset = (-29, -32)
+        self.speed = speed
+
+    def reset(self, y, speed):
+        """Reset meteoroid
+        - Moves a meteoroid from the meteoroid pool back to the invisible area next to the right window border
+
+        Args:
+            - y (int):       Y-coordinate where the met should be placed
+            - speed (float): Speed with which the meteoroid flies to the left
+
+        Test:
+            - Check if a reused meteoroid is created next to the right window border
+        """
+        self.rect.topleft = (windowwidth, y)
+        self.speed = speed
+
+    def kill(self):
+        """Kill meteoroid
+        - Removes the meteoroid from all groups and puts it back into the meteoroid pool
+        - A meteoroid which is in no group anymore is not put into the pool again
 
-    def spawn():
+        Test:
+            - Check if the meteoroid is removed when it is hit by a bullet or it leaves the window
+            - Check if the meteoroid is reused for the next spawn
+        """
+        if self.alive():
+            pygame.sprite.Sprite.kill(self)
+            game.meteoroid_pool.release(self)
+
+    def spawn(speed):
         """Spawnes the meteoroid
         - Creates the meteorite at a random y-height in the window
 
+        Args:
+            - speed (float): Speed with which the meteoroid flies to the left
+
         Return:
-            - Returns the meteoroid object
+            - Returns the meteoroid object from the meteoroid pool
 
         Test:
             - Check if meteoroid is created next to the right window border
             - Check if two or more meteors are randomly distributed in the y-height
             - Check if object is created
         """
-        return Meteoroid(random.uniform(33, windowheight - 33))
+        return game.meteoroid_pool.get(random.uniform(33, windowheight - 33), speed)
         
     def update(self, speed):
         """Update the meteoroid
         - Moves the meteoroid to the left
-        - Animates an explosion when the meteroid is hit
+        - Kills the meteoroid when it has left the window on the left side
 
         Args:
             - speed (int): Speed with which the meteoroid flies to the left
 
         Test:
-            - Check if the meteroid cycles through images for the expolsion when it was hit by a bullet
-            - Check if the meteroid is deleted from the sprite group when the animation is finished
             - Check if the meteroid speeds up or slows down when you change the speed
+            - Check if the meteorite number decreases when the meteorite leaves the window on the left side
         """
-        if self.state+1 == len(game.image_meteoroid):
-            self.kill()
-        elif self.state > 0:
-            self.state += 1
-
         self.rect.x -= speed
-        screen.blit(game.image_meteoroid[self.state], (self.rect.x-29, self.rect.y-32))
+
+        if self.rect.x < -96:
+            self.kill()
 
 
 
@@ -679,6 +1190,10 @@ class Game():
         """Initialize game
         - Creats Image_Lists for different objects in game
         - Calculates the screen size and the required background images for the parallax background.
+        - Creates a clock to limit the game to 60 frames per second
+        - Creates the pools in which bullets and meteoroids are kept for reuse
+        - Pre-renders every background layer into one strip, which is wide enough to cover the window while scrolling
+        - The strip of the first layer has no alpha channel, because this layer is opaque and covers the whole window
 
         Test:
             - Check if the image lists contain images
@@ -702,6 +1217,24 @@ class Game():
         self.bg_width = self.bg_game[0].get_width()
         self.tiles = math.ceil(windowwidth / self.bg_width) + 1
         self.scroll = [0 for x in range(len(self.bg_game))]
+
+        self.bg_strips = []
+        for i, image in enumerate(self.bg_game):
+            if i == 0:
+                strip = pygame.Surface((self.bg_width * self.tiles, windowheight)).convert()
+            else:
+                strip = pygame.Surface((self.bg_width * self.tiles, windowheight), pygame.SRCALPHA).convert_alpha()
+            strip.blits([(image, (x * self.bg_width, 0)) for x in range(self.tiles)], doreturn=0)
+            self.bg_strips.append(strip)
+
+        self.score_font = pygame.font.Font("./assets/fonts/silkscreen-regular.ttf", 20)
+        self.score_value = None
+        self.score_surface = None
+
+        self.clock = pygame.time.Clock()
+
+        self.bullet_pool = Sprite_Pool(Bullet)
+        self.meteoroid_pool = Sprite_Pool(Meteoroid)
         logger.info("Game initialized")
 
     def animateBackground(self):
@@ -714,18 +1247,40 @@ class Game():
             - Check if the background scrolls infinitely to the left
             - Check if the different layers move with different speed
         """
-        for i in range(len(self.bg_game)):
-            for x in range(self.tiles):
-                screen.blit(self.bg_game[i], ((x * self.bg_width) + self.scroll[i], 0))
+        screen.blits([(self.bg_strips[i], (self.scroll[i], 0)) for i in range(len(self.bg_strips))], doreturn=0)
 
+        for i in range(len(self.bg_game)):
             self.scroll[i] -= ((i+1) * 0.5)
 
             if abs(self.scroll[i]) > self.bg_width:
                 self.scroll[i] = 0
 
+    def animateExplosions(self, explosions, speed):
+        """Animate explosions
+        - Moves every explosion to the left like the meteoroid which was hit
+        - Switches each explosion to the next image and removes it when the animation is finished
+        - Explosions are [rect, state] entries instead of sprites, the hit meteoroid itself is already back in the pool
+
+        Args:
+            - explosions (list): Explosions with the rect where to draw and the index of the current image
+            - speed (float):     Speed with which the explosions fly to the left
+
+        Tests:
+            - Check if the explosion cycles through the images when a meteoroid is hit by a bullet
+            - Check if the explosion is removed when the animation is finished
+            - Check if the explosion flies with the speed of the meteoroids
+        """
+        for explosion in explosions:
+            explosion[0].x -= speed
+            explosion[1] += 1
+
+        explosions[:] = [explosion for explosion in explosions if explosion[1] < len(self.image_meteoroid)]
+        screen.blits([(self.image_meteoroid[state], rect) for rect, state in explosions], doreturn=0)
+
     def animateScore(self, score):
             """Display score
             - Renders the score in the top left corner of the game
+            - The text is only rendered again every 10 points or when a meteoroid was hit
 
             Args:
                 - score (int): Score to be displayed
@@ -733,12 +1288,13 @@ class Game():
             Tests:
                 - Check if the score and the text "Score :" are displayed in the game
                 - Check if the score increases in the course of the game
+                - Check if the score is updated immediately when a meteoroid is hit
             """
-            font = pygame.font.Font("./assets/fonts/silkscreen-regular.ttf", 20)
-            surface = font.render("Score: " + str(score), True, (255,255,255))
-            rect = surface.get_rect()
-            rect.topleft = (3, 0)
-            screen.blit(surface, rect)
+            if self.score_value is None or score - self.score_value >= 100 or (score % 10 == 0 and score != self.score_value):
+                self.score_value = score
+                self.score_surface = self.score_font.render("Score: " + str(score), True, (255,255,255))
+
+            screen.blit(self.score_surface, (3, 0))
 
     def play(self):
         """Main game function
@@ -746,6 +1302,13 @@ class Game():
         - Lets the player control his ship and shoot meteroids
         - Spawns the meteroids in a certain interval 
         - As the game progresses there will be more meteroids and the speed of them will increase
+        - Fills the bullet and meteoroid pools before the game starts
+        - Moves all bullets and meteoroids in one loop with the speed stored on each sprite
+        - Each frame is split into handling the input, advancing the game and rendering it
+        - handle_events() and step() return False when the game is over, then the game over screen is returned as next screen
+
+        Return:
+            - Returns the game over screen with the achieved score as next screen
 
         Tests:
             - Check if the player can move his ship and shoot with it
@@ -757,142 +1320,130 @@ class Game():
             - Check if a different music than in the menu is played        
         """
         pygame.display.set_caption("Space Defenders")
-        pygame.mixer.music.load("./assets/music/game.mp3")
-        pygame.mixer.music.play(loops = -1, fade_ms = 1000)
-
-        global left
-        global right
-        global up
-        global down
-        global move
-        global stand
-    
-        score = 0
+        menu.playMusic(game_music)
 
-        move = 0
-        stand = 0
-        player_speed = 3
-        bullet_timer = True
-        
-        meteoroid_speed = 4
-        meteoroid_timer = 1500
-        
-        previous_time = pygame.time.get_ticks()
+        self.score_value = None
+
+        state = Game_State()
 
         player = Player()
+        controls = Input_State()
+        #The ship may leave the window with all but 50px on the right and bottom side
+        player_area = pygame.Rect(0, 0, windowwidth - 50 + player.rect.width, windowheight - 50 + player.rect.height)
+
+        self.bullet_pool.fill(10, 0, 0)
+        self.meteoroid_pool.fill(32, 0, 0)
         player_group = pygame.sprite.GroupSingle(player)
-        bullet_group = pygame.sprite.Group()
-        meteoroid_group = pygame.sprite.Group()
-        meteoroid_group_exploded = pygame.sprite.Group()
+        bullet_group = Sprite_Group()
+        meteoroid_group = Sprite_Group()
+        explosions = []
+        mover_group = Sprite_Group()
 
         METEOROID_TIMER = pygame.USEREVENT + 0
-        pygame.time.set_timer(METEOROID_TIMER, meteoroid_timer)
+        pygame.time.set_timer(METEOROID_TIMER, state.meteoroid_timer)
 
         DIFFICULTY_INCREASE = pygame.USEREVENT + 1
         pygame.time.set_timer(DIFFICULTY_INCREASE, 15000)
 
-        while True:
-            game.animateBackground()
-
-            left = False
-            right = False  
-            up = False  
-            down = False
-
-            score += 1
-
-            for event in pygame.event.get():
-                if event.type == METEOROID_TIMER:
-                    meteoroid_group.add(Meteoroid.spawn())
-
-                if event.type == DIFFICULTY_INCREASE:
-                    meteoroid_speed += 0.25
-                    if meteoroid_timer > 200:
-                        meteoroid_timer -= 100
-                    pygame.time.set_timer(METEOROID_TIMER, meteoroid_timer)
-                    logger.info("Game difficultry increased. Meteoroid speed now at '" + str(meteoroid_speed) + "' and Meteoroid spawn timer at '" + str(meteoroid_timer) + "'ms")
-
-                if event.type == pygame.QUIT:
-                    logger.info("Game endet via close button on window")
-                    pygame.quit()
-                    sys.exit()
-            
-            key = pygame.key.get_pressed()
-
-            if key[pygame.K_a]:
-                left   = True
-                right  = False
-                up     = False
-                down   = False
-
-                if  player.rect.x >= 0:
-                    player.rect.x -= player_speed
-
-            if key[pygame.K_d]:
-                left   = False
-                right  = True
-                up     = False
-                down   = False
-
-                if  player.rect.x <= windowwidth - 50:
-                    player.rect.x += player_speed
-
-            if key[pygame.K_w]:
-                left   = False
-                right  = False
-                up     = True
-                down   = False
-
-                if  player.rect.y  >= 0:
-                    player.rect.y -= player_speed
-
-            if key[pygame.K_s]:
-                left   = False
-                right  = False
-                up     = False
-                down   = True
-
-                if  player.rect.y <= windowheight - 50:
-                    player.rect.y += player_speed
-
-            if key[pygame.K_SPACE]:
-                #Inspired by https://stackoverflow.com/a/48357144
-                current_time = pygame.time.get_ticks()
-                if current_time - previous_time > 500:
-                    previous_time = current_time
-                    bullet_group.add(player.shoot())
-
-            if key[pygame.K_ESCAPE]:
+        def spawn(event):
+            meteoroid = Meteoroid.spawn(state.meteoroid_speed)
+            meteoroid_group.add(meteoroid)
+            mover_group.add(meteoroid)
+
+        def increase_difficulty(event):
+            state.meteoroid_speed += 0.25
+            if state.meteoroid_timer > 200:
+                state.meteoroid_timer -= 100
+            for sprite in meteoroid_group:
+                sprite.speed = state.meteoroid_speed
+            pygame.time.set_timer(METEOROID_TIMER, state.meteoroid_timer)
+            logger.info("Game difficulty increased. Meteoroid speed now at '{}' and Meteoroid spawn timer at '{}'ms", state.meteoroid_speed, state.meteoroid_timer)
+
+        handlers = {
+            METEOROID_TIMER:     spawn,
+            DIFFICULTY_INCREASE: increase_difficulty,
+            pygame.QUIT:         menu.quit
+        }
+        events = list(handlers)
+
+        animate_background = self.animateBackground
+        animate_explosions = self.animateExplosions
+        animate_score = self.animateScore
+        get_ticks = pygame.time.get_ticks
+        get_events = pygame.event.get
+        clear_events = pygame.event.clear
+        get_pressed = pygame.key.get_pressed
+        update = pygame.display.update
+        tick = self.clock.tick
+
+        def handle_events():
+            for event in get_events(events):
+                handlers[event.type](event)
+            clear_events(pump=False)
+
+            key = get_pressed()
+
+            controls.left, controls.right, controls.up, controls.down = key[K_a], key[K_d], key[K_w], key[K_s]
+            controls.shoot = key[K_SPACE]
+
+            if key[K_ESCAPE]:
                 logger.info("Player returned to menu")
                 logger.info("Gameover")
-                menu.gameover(score)
+                return False
+
+            return True
+
+        def step():
+            state.score += 1
+
+            player.rect.move_ip((controls.right - controls.left) * state.player_speed, (controls.down - controls.up) * state.player_speed)
+            player.rect.clamp_ip(player_area)
 
-            player.update()               
+            #Inspired by https://stackoverflow.com/a/48357144
+            if controls.shoot:
+                now = get_ticks()
+                if now > state.next_fire_tick:
+                    state.next_fire_tick = now + 500
+                    bullet = player.shoot()
+                    bullet_group.add(bullet)
+                    mover_group.add(bullet)
 
-            gameover = pygame.sprite.spritecollide(player, meteoroid_group, True, collided = None)
+            gameover = meteoroid_group.collideSprite(player)
             if len(gameover) != 0:
                 logger.info("Player hit Meteoroid")
                 logger.info("Gameover")
-                menu.gameover(score)
+                return False
 
-            hit = pygame.sprite.groupcollide(meteoroid_group, bullet_group, False, True)
+            hit = meteoroid_group.collide(bullet_group)
             for sprite in hit:
-                sprite.state += 1
-                meteoroid_group.remove(sprite)
-                meteoroid_group_exploded.add(sprite)
-                score += 100
+                explosions.append([sprite.rect.move(sprite.offset), 1])
+                sprite.kill()
+                state.score += 100
 
-            pygame.sprite.spritecollide(window_right, bullet_group, True)
-            pygame.sprite.spritecollide(window_left, meteoroid_group, True)
-            
-            meteoroid_group.update(meteoroid_speed)
-            meteoroid_group_exploded.update(meteoroid_speed)
-            bullet_group.update(5)
-            game.animateScore(score)
-            pygame.display.update()
+            for sprite in mover_group.sprites():
+                sprite.update(sprite.speed)
 
+            return True
+
+        def render():
+            animate_background()
+            player.update(controls)
+            meteoroid_group.draw(screen)
+            animate_explosions(explosions, state.meteoroid_speed)
+            bullet_group.draw(screen)
+            animate_score(state.score)
+            tick(60)
+            update()
+
+        while handle_events() and step():
+            render()
+
+        return lambda: menu.gameover(state.score)
 
 
 game = Game()
 menu = Menu()
-menu.start()
\ No newline at end of file
+
+next_screen = menu.start
+while True:
+    next_screen = next_screen()
\ No newline at end of file